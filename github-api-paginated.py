@@ -1,13 +1,38 @@
-import requests
-import re
+import httpx
+import io
 import json
+import threading
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
 import csv
+import gzip
 from datetime import datetime
 import os
+import random
+import shelve
 import time
 import logging
 import argparse
 
+# orjson parses and serializes several times faster than the json module,
+# fall back to the standard library when it isn't installed
+try:
+    import orjson
+
+    def json_loads(content):
+        return orjson.loads(content)
+
+    def json_dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def json_loads(content):
+        return json.loads(content)
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,9 +40,100 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO, which drowns out our own progress logs
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Number of pages fetched concurrently once the last page is known
+MAX_WORKERS = 8
+
+# Back off when fewer than this many requests (or 2% of the limit) remain
+RATE_LIMIT_THRESHOLD = 5
+
+# Shared HTTP/2 client so all pages, including concurrent ones, are
+# multiplexed over one HTTPS connection
+_CLIENT = httpx.Client(
+    http2=True,
+    timeout=30,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=MAX_WORKERS)
+)
+
+# Output files are written through a 1 MiB buffer to cut down on write syscalls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Compressed output favours speed, audit log JSON compresses well even at level 1
+GZIP_COMPRESSLEVEL = 1
+
+# Retry backoff grows from BACKOFF_BASE seconds up to BACKOFF_CAP seconds.
+# With jitter the 7 waits before giving up add up to ~13 s on average
+# (25 s at most), so transient failures still get time to clear.
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 60
+MAX_RETRIES = 8
+
+# On-disk ETag cache so unchanged pages come back as 304 Not Modified,
+# entries older than CACHE_TTL seconds are evicted
+CACHE_FILE = '.github_api_cache'
+CACHE_TTL = 12 * 60 * 60
+
+# GraphQL endpoint and queries (100 nodes per round trip). The GraphQL
+# audit log lives on organizations, so the enterprise's organizations are
+# listed first and each of their audit logs is paged through in turn.
+GRAPHQL_URL = "https://api.github.com/graphql"
+ENTERPRISE_ORGANIZATIONS_QUERY = """
+query($enterprise: String!, $after: String) {
+  enterprise(slug: $enterprise) {
+    organizations(first: 100, after: $after) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        login
+      }
+    }
+  }
+}
+"""
+ORGANIZATION_AUDIT_LOG_QUERY = """
+query($organization: String!, $phrase: String, $after: String) {
+  organization(login: $organization) {
+    auditLog(first: 100, after: $after, query: $phrase) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        ... on Node {
+          id
+        }
+        ... on AuditEntry {
+          action
+          actorLogin
+          createdAt
+          operationType
+          userLogin
+        }
+        ... on OrganizationAuditEntryData {
+          organizationName
+        }
+        ... on RepositoryAuditEntryData {
+          repositoryName
+        }
+      }
+    }
+  }
+}
+"""
 
 class GitHubRateLimitError(Exception):
-    """Custom exception for GitHub rate limit errors"""
+    """Custom exception for GitHub rate limit errors reported in a response body"""
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+class GitHubGraphQLError(Exception):
+    """Custom exception for GraphQL errors that retrying won't fix"""
     pass
 
 def get_github_token():
@@ -34,211 +150,618 @@ def get_github_token():
     logger.info("GitHub token retrieved successfully")
     return token
 
+def get_github_tokens():
+    """
+    Retrieve a list of GitHub tokens from the comma-separated GITHUB_TOKENS
+    environment variable, falling back to a single token
+    """
+    tokens = [token.strip() for token in os.environ.get('GITHUB_TOKENS', '').split(',') if token.strip()]
+
+    if not tokens:
+        return [get_github_token()]
+
+    logger.info(f"Retrieved {len(tokens)} GitHub tokens")
+    return tokens
+
+class TokenPool:
+    """
+    Round-robin pool of GitHub tokens. Tokens whose rate limit runs low are
+    skipped until their reset time, and callers wait only once every token
+    in the pool is held back. Shared across the concurrent page workers.
+    """
+    def __init__(self, tokens):
+        self.tokens = deque(tokens)
+        self.resume_at = {token: 0.0 for token in tokens}
+        self.lock = threading.Lock()
+
+    def next_token(self):
+        """
+        Return the next usable token, waiting for a reset if none is available
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                for _ in range(len(self.tokens)):
+                    token = self.tokens[0]
+                    self.tokens.rotate(-1)
+                    if self.resume_at[token] <= now:
+                        return token
+
+                wait_time = min(self.resume_at.values()) - now
+
+            logger.info(f"Waiting for rate limit reset. Wait time: {wait_time:.0f} seconds.")
+            time.sleep(wait_time)
+            logger.info("Resuming operations as rate limit should have been reset.")
+
+    def hold(self, token, resume_at):
+        """
+        Stop handing out a token until the given time
+        """
+        with self.lock:
+            self.resume_at[token] = max(self.resume_at[token], resume_at)
+
+class ResponseCache:
+    """
+    ETag cache of page bodies, kept in a shelve file that is opened once per
+    run. Expired entries are evicted on open so audit data doesn't linger on
+    disk. Shared across the concurrent page workers.
+    """
+    def __init__(self, filename):
+        self.shelf = shelve.open(filename)
+        self.lock = threading.Lock()
+
+        now = time.time()
+        expired = [key for key, entry in self.shelf.items() if now - entry['cached_at'] >= CACHE_TTL]
+        for key in expired:
+            del self.shelf[key]
+        logger.info(f"Opened response cache {filename}, evicted {len(expired)} expired entries")
+
+    def get(self, key):
+        """
+        Return the cached entry for a URL, or None if missing or expired
+        """
+        with self.lock:
+            entry = self.shelf.get(key)
+
+        if entry and time.time() - entry['cached_at'] < CACHE_TTL:
+            return entry
+        return None
+
+    def set(self, key, entry):
+        """
+        Store the entry for a URL
+        """
+        with self.lock:
+            self.shelf[key] = entry
+
+    def close(self):
+        with self.lock:
+            self.shelf.close()
+
+# Keys in object responses that don't include the array of items
+METADATA_KEYS = frozenset(('incomplete_results', 'repository_selection', 'total_count'))
+
 def parse_data(data, page_number):
     """
     Parse data with additional logging
     """
-    logger.info(f"Parsing data for page {page_number}")
+    logger.debug("Parsing data for page %d", page_number)
 
     # If the data is an array, return that
     if isinstance(data, list):
-        logger.info(f"Page {page_number} contains a direct list. Returning as-is.")
+        logger.debug("Page %d contains a direct list. Returning as-is.", page_number)
         return data
 
     # Some endpoints respond with None instead of empty array
     # when there is no data. In that case, return an empty array.
     if not data:
-        logger.warning(f"Page {page_number} contains no data. Returning empty list.")
+        logger.warning("Page %d contains no data. Returning empty list.", page_number)
         return []
 
     # Otherwise, the array of items that we want is in an object
-    # Delete keys that don't include the array of items
-    data = data.copy()
-    data.pop('incomplete_results', None)
-    data.pop('repository_selection', None)
-    data.pop('total_count', None)
+    # Pull it out from the first key that isn't pagination metadata
+    for key in data:
+        if key not in METADATA_KEYS:
+            items = data[key]
+            logger.debug("Successfully parsed page %d. Retrieved %d items.", page_number, len(items))
+            return items
 
-    # Pull out the array of items
-    namespace_key = list(data.keys())[0]
-    data = data[namespace_key]
+    logger.warning("Page %d contains no items. Returning empty list.", page_number)
+    return []
 
-    logger.info(f"Successfully parsed page {page_number}. Retrieved {len(data)} items.")
-    return data
-
-def check_rate_limit(response):
+def check_rate_limit(response, token, token_pool):
     """
-    Check and handle GitHub API rate limits
+    Check and handle GitHub API rate limits. Returns True when the request
+    was rejected for exceeding the rate limit and should be retried.
     """
-    # Check if rate limit headers exist
-    remaining = int(response.headers.get('X-RateLimit-Remaining', 0))
-    reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
+    if response.headers.get('X-RateLimit-Remaining') != '0':
+        return False
 
-    if remaining == 0:
-        # Calculate wait time
-        current_time = int(time.time())
-        wait_time = max(reset_time - current_time + 1, 0)
+    logger.warning("Rate limit reached. Current remaining requests: 0")
+    maybe_throttle(response, token, token_pool)
+    return True
 
-        logger.warning(f"Rate limit reached. Current remaining requests: {remaining}")
-        logger.info(f"Waiting for rate limit reset. Wait time: {wait_time} seconds.")
+def get_backoff_time(retries, response=None):
+    """
+    Full jitter exponential backoff, honoring Retry-After when GitHub sends it
+    """
+    wait_time = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** retries)))
 
-        time.sleep(wait_time)
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '0')
+        if retry_after.isdigit():
+            wait_time = max(wait_time, int(retry_after))
 
-        logger.info("Resuming operations as rate limit should have been reset.")
+    return wait_time
 
-        raise GitHubRateLimitError("Rate limit reached. Waiting to retry.")
+def parse_json(response):
+    """
+    Parse a JSON response body. A body that isn't valid JSON, such as a
+    truncated page or an HTML error page, raises a retriable httpx error.
+    """
+    try:
+        return json_loads(response.content)
+    except ValueError as e:
+        raise httpx.DecodingError(f"Invalid JSON in response: {e}", request=response.request) from e
 
-def get_paginated_data(url, token=None, max_retries=3):
-    # Next page link pattern
-    next_pattern = re.compile(r'(?<=<)([\S]*)(?=>; rel="next")', re.IGNORECASE)
+def cached_get(url, params=None, token=None, cache=None):
+    """
+    GET a URL with If-None-Match from the ETag cache, if one is given.
+    Returns the response and its parsed body, served from the cache on
+    304 Not Modified.
+    """
+    # httpx replaces the URL's query string with params, merge them instead
+    url = httpx.URL(url).copy_merge_params(params or {})
+    key = str(url)
+
+    entry = cache.get(key) if cache else None
+
+    headers = {"Authorization": f"Bearer {token}"}
+    if entry:
+        headers['If-None-Match'] = entry['etag']
+
+    response = _CLIENT.get(url, headers=headers)
+
+    if response.status_code == 304:
+        logger.debug("Page not modified, using cached copy: %s", key)
+        # 304 responses don't repeat the Link header, restore it so
+        # pagination carries on past revalidated pages
+        if entry['link']:
+            response.headers['Link'] = entry['link']
+        return response, entry['body']
+
+    if not response.is_success:
+        return response, None
+
+    body = parse_json(response)
+    etag = response.headers.get('ETag')
+    if cache and etag:
+        cache.set(key, {
+            'etag': etag,
+            'body': body,
+            'link': response.headers.get('Link'),
+            'cached_at': time.time()
+        })
+
+    return response, body
+
+def maybe_throttle(response, token, token_pool):
+    """
+    Hold a token back until its rate limit resets once the remaining budget
+    runs low, instead of waiting for GitHub to reject a request
+    """
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining is None:
+        return
 
-    # Ensure token is provided
-    if not token:
-        token = get_github_token()
+    remaining = int(remaining)
+    limit = int(response.headers.get('X-RateLimit-Limit', 0))
 
-    # Headers for GitHub API
-    headers = {
-        "X-GitHub-Api-Version": "2022-11-28",
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {token}"
-    }
+    if remaining < max(RATE_LIMIT_THRESHOLD, int(0.02 * limit)):
+        reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
+        used = response.headers.get('X-RateLimit-Used')
+        logger.warning(f"Rate limit nearly reached. Remaining requests: {remaining}, used: {used}")
 
-    pages_remaining = True
-    data = []
+        token_pool.hold(token, reset_time + 1 + random.uniform(0, 1))
+
+def request_with_retries(send, token_pool, max_retries=MAX_RETRIES):
+    """
+    Send a request with the next token from the pool, waiting out rate limits
+    and retrying failed requests with backoff. send takes a token and returns
+    the response and its parsed body. Raises the last error once max_retries
+    is reached.
+    """
     retries = 0
-    page_number = 1
 
-    logger.info(f"Starting pagination for URL: {url}")
+    while True:
+        token = token_pool.next_token()
 
-    while pages_remaining and retries < max_retries:
         try:
-            logger.info(f"Fetching page {page_number}")
-
-            # Make the request
-            response = requests.get(
-                url, 
-                headers=headers, 
-                params={"per_page": 100}
-            )
+            response, body = send(token)
 
             # Check for rate limiting
-            if response.status_code == 403:
-                try:
-                    check_rate_limit(response)
-                except GitHubRateLimitError:
-                    continue
+            if response.status_code in (403, 429) and check_rate_limit(response, token, token_pool):
+                continue
 
             # Detailed error handling
             if response.status_code == 403:
                 logger.error("Error 403: Forbidden")
                 logger.error(f"Response headers: {response.headers}")
                 logger.error(f"Response content: {response.text}")
-                raise requests.exceptions.HTTPError("Access Forbidden", response=response)
-
-            # Raise an exception for other bad responses
-            response.raise_for_status()
+                raise httpx.HTTPStatusError("Access Forbidden", request=response.request, response=response)
 
-            # Parse the response data
-            parsed_data = parse_data(response.json(), page_number)
-            data.extend(parsed_data)
+            # Raise an exception for other bad responses,
+            # 304 Not Modified has already been served from the cache
+            if response.status_code != 304:
+                response.raise_for_status()
 
-            # Check for more pages
-            link_header = response.headers.get('Link')
-            pages_remaining = link_header and 'rel="next"' in link_header
+            # Slow down before the rate limit is exhausted
+            maybe_throttle(response, token, token_pool)
+            return response, body
 
-            if pages_remaining:
-                # Extract next page URL
-                url = next_pattern.search(link_header).group(1)
-                logger.info(f"More pages available. Moving to next page: {url}")
-                page_number += 1
-            else:
-                logger.info("No more pages to retrieve.")
+        except (httpx.HTTPError, GitHubRateLimitError) as e:
+            # Rate limiting reported in the body, e.g. by GraphQL
+            if isinstance(e, GitHubRateLimitError) and check_rate_limit(e.response, token, token_pool):
+                continue
 
-            # Reset retries on successful request
-            retries = 0
-
-        except requests.exceptions.RequestException as e:
             logger.error(f"Request error occurred: {e}")
             retries += 1
 
             if retries >= max_retries:
                 logger.error(f"Max retries ({max_retries}) reached. Stopping.")
-                break
+                raise
 
-            # Exponential backoff
-            wait_time = 2 ** retries
-            logger.warning(f"Retrying in {wait_time} seconds... (Attempt {retries})")
+            # Exponential backoff with jitter
+            wait_time = get_backoff_time(retries, getattr(e, 'response', None))
+            logger.warning(f"Retrying in {wait_time:.1f} seconds... (Attempt {retries})")
             time.sleep(wait_time)
 
-    logger.info(f"Pagination complete. Total items retrieved: {len(data)}")
-    return data
-
-def save_to_json(data, filename=None):
+def build_page_urls(last_url):
     """
-    Save data to a JSON file. If no filename is provided, 
-    generate a filename based on current timestamp.
+    Build the URLs for pages 2..last from the Link header's last page URL
     """
-    if not filename:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"github_data_{timestamp}.json"
+    parts = urlsplit(last_url)
+    query = parse_qs(parts.query)
+    last_page = int(query['page'][0])
+
+    page_urls = []
+    for page in range(2, last_page + 1):
+        query['page'] = [str(page)]
+        page_urls.append(urlunsplit(parts._replace(query=urlencode(query, doseq=True))))
+    return page_urls
 
-    logger.info(f"Saving data to JSON file: {filename}")
+def fetch_page(url, page_number, token_pool, cache=None, max_retries=MAX_RETRIES):
+    """
+    Fetch and parse a single page, used by the concurrent page workers
+    """
+    logger.info("Fetching page %d", page_number)
+    response, body = request_with_retries(
+        lambda token: cached_get(url, token=token, cache=cache),
+        token_pool,
+        max_retries
+    )
+    return parse_data(body, page_number)
+
+def fetch_remaining_pages(last_url, token_pool, cache=None, max_retries=MAX_RETRIES):
+    """
+    Fetch pages 2..last concurrently, yielding their items in page order.
+    A page that fails after its retries raises, and pages that haven't
+    started yet are cancelled when that happens or when the caller stops.
+    """
+    page_urls = build_page_urls(last_url)
+    logger.info(f"Fetching {len(page_urls)} remaining pages with {MAX_WORKERS} workers")
 
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    pages = enumerate(page_urls, start=2)
+    pending = deque()
 
-    logger.info(f"Successfully saved {len(data)} items to {filename}")
-    return filename
+    def submit_next_page():
+        page = next(pages, None)
+        if page:
+            page_number, page_url = page
+            pending.append(executor.submit(fetch_page, page_url, page_number, token_pool, cache, max_retries))
 
-def save_to_csv(data, filename=None):
+    try:
+        # Only keep a bounded window of pages in flight, and drop each page
+        # once it has been handed on, so memory stays bounded even when the
+        # consumer is slower than the downloads
+        for _ in range(MAX_WORKERS * 2):
+            submit_next_page()
+
+        while pending:
+            parsed_data = pending.popleft().result()
+            submit_next_page()
+            yield from parsed_data
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def iter_paginated_data(url, token=None, max_retries=MAX_RETRIES, cache=None):
     """
-    Save data to a CSV file. If no filename is provided, 
-    generate a filename based on current timestamp.
+    Yield items from a paginated REST endpoint page by page, so callers
+    can process them without holding the whole result in memory
     """
-    if not data:
-        logger.warning("No data to save.")
-        return None
+    # Use the given token, or every token configured in the environment
+    token_pool = TokenPool([token] if token else get_github_tokens())
+
+    # Headers for GitHub API, the Authorization header is set per request
+    headers = {
+        "X-GitHub-Api-Version": "2022-11-28",
+        "Accept": "application/vnd.github+json"
+    }
+    _CLIENT.headers.update(headers)
+
+    pages_remaining = True
+    last_url = None
+    item_count = 0
+    page_number = 1
 
-    if not filename:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"github_data_{timestamp}.csv"
+    logger.info(f"Starting pagination for URL: {url}")
 
-    logger.info(f"Preparing to save data to CSV file: {filename}")
+    while pages_remaining:
+        logger.info("Fetching page %d", page_number)
+
+        # Make the request
+        response, body = request_with_retries(
+            lambda token: cached_get(url, params={"per_page": 100}, token=token, cache=cache),
+            token_pool,
+            max_retries
+        )
+
+        # Parse the response data
+        parsed_data = parse_data(body, page_number)
+        item_count += len(parsed_data)
+        yield from parsed_data
+
+        # Offset-paginated endpoints advertise the last page up front,
+        # so the rest can be fetched concurrently
+        last_link = response.links.get('last')
+        if page_number == 1 and last_link and 'page' in parse_qs(urlsplit(last_link['url']).query):
+            last_url = last_link['url']
+            break
+
+        # Check for more pages, httpx already parses the Link header
+        next_link = response.links.get('next')
+        pages_remaining = next_link is not None
+
+        if pages_remaining:
+            url = next_link['url']
+            logger.debug("More pages available. Moving to next page: %s", url)
+            page_number += 1
+        else:
+            logger.info("No more pages to retrieve.")
+
+    if last_url:
+        for item in fetch_remaining_pages(last_url, token_pool, cache, max_retries):
+            item_count += 1
+            yield item
+
+    logger.info(f"Pagination complete. Total items retrieved: {item_count}")
+
+def iter_graphql_nodes(query, variables, path, token_pool, max_retries=MAX_RETRIES):
+    """
+    Yield the nodes of the GraphQL connection found at path in the response
+    data page by page, following the pageInfo cursor instead of the REST
+    Link header.
+    """
+    has_next_page = True
+    cursor = None
+    item_count = 0
+    page_number = 1
 
-    # Determine which keys to use based on the first item
-    first_item = data[0]
-    keys = []
+    def send(token):
+        response = _CLIENT.post(
+            GRAPHQL_URL,
+            headers={"Authorization": f"Bearer {token}"},
+            json={"query": query, "variables": {**variables, "after": cursor}}
+        )
+        if not response.is_success:
+            return response, None
+
+        # GraphQL reports errors in the body with a 200 status
+        body = parse_json(response)
+        errors = body.get('errors') or []
+        if any(error.get('type') == 'RATE_LIMITED' for error in errors):
+            raise GitHubRateLimitError("GraphQL rate limit reached", response)
+        return response, body
+
+    while has_next_page:
+        logger.info("Fetching %s page %d", '.'.join(path), page_number)
+
+        # Make the request
+        response, body = request_with_retries(send, token_pool, max_retries)
+
+        # Errors other than rate limiting are a bad query or a missing
+        # enterprise or organization, which retrying won't fix
+        if body.get('errors'):
+            raise GitHubGraphQLError(f"GraphQL query failed: {body['errors']}")
+
+        connection = body.get('data')
+        for key in path:
+            connection = connection.get(key) if connection else None
+        if connection is None:
+            raise GitHubGraphQLError(f"GraphQL response has no {'.'.join(path)} for {variables}")
+
+        parsed_data = parse_data(connection['nodes'], page_number)
+        item_count += len(parsed_data)
+        yield from parsed_data
+
+        # Check for more pages
+        page_info = connection['pageInfo']
+        has_next_page = page_info['hasNextPage']
+
+        if has_next_page:
+            cursor = page_info['endCursor']
+            logger.debug("More pages available. Moving to cursor: %s", cursor)
+            page_number += 1
+        else:
+            logger.info("No more pages to retrieve.")
+
+    logger.info(f"Pagination complete. Total items retrieved: {item_count}")
+
+def iter_graphql_audit_log(enterprise, phrase=None, token=None, max_retries=MAX_RETRIES):
+    """
+    Yield the audit log entries of every organization in an enterprise
+    through the GraphQL API
+    """
+    # Use the given token, or every token configured in the environment
+    token_pool = TokenPool([token] if token else get_github_tokens())
+
+    logger.info(f"Starting GraphQL pagination for enterprise: {enterprise}")
+
+    organizations = list(iter_graphql_nodes(
+        ENTERPRISE_ORGANIZATIONS_QUERY,
+        {"enterprise": enterprise},
+        ('enterprise', 'organizations'),
+        token_pool,
+        max_retries
+    ))
+    logger.info(f"Found {len(organizations)} organizations in enterprise {enterprise}")
+
+    for organization in organizations:
+        logger.info(f"Retrieving audit log for organization: {organization['login']}")
+        yield from iter_graphql_nodes(
+            ORGANIZATION_AUDIT_LOG_QUERY,
+            {"organization": organization['login'], "phrase": phrase},
+            ('organization', 'auditLog'),
+            token_pool,
+            max_retries
+        )
+
+def default_filename(extension, compress=False):
+    """
+    Generate an output filename based on current timestamp
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = '.gz' if compress else ''
+    return f"github_data_{timestamp}.{extension}{suffix}"
+
+def open_binary_output(filename, compress=False):
+    """
+    Open an output file for binary writing through a large buffer,
+    gzip compressing it on the fly if requested
+    """
+    if compress:
+        return io.BufferedWriter(gzip.open(filename, 'wb', compresslevel=GZIP_COMPRESSLEVEL), WRITE_BUFFER_SIZE)
+    return open(filename, 'wb', buffering=WRITE_BUFFER_SIZE)
 
-    def flatten_dict(d, parent_key='', sep='_'):
-        """Flatten nested dictionaries"""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
+def open_output(filename, compress=False):
+    """
+    Open an output file for text writing through a large buffer
+    """
+    return io.TextIOWrapper(open_binary_output(filename, compress), encoding='utf-8', newline='')
 
-            if isinstance(v, dict):
-                items.extend(flatten_dict(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                # Convert list to string to avoid CSV issues
-                items.append((new_key, str(v)))
-            else:
-                items.append((new_key, v))
-        return dict(items)
+@contextmanager
+def open_atomic_output(filename, compress=False, text=False):
+    """
+    Open an output file under a temporary name, renaming it into place only
+    once writing has finished. If writing stops early the temporary file is
+    deleted, so no truncated output is left behind.
+    """
+    temp_filename = f"{filename}.part"
+    opener = open_output if text else open_binary_output
+    f = opener(temp_filename, compress)
 
-    # Flatten the first item to get keys
-    flattened_first_item = flatten_dict(first_item)
-    keys = list(flattened_first_item.keys())
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.remove(temp_filename)
+        raise
 
-    logger.info(f"Detected {len(keys)} unique keys for CSV")
+    f.close()
+    os.replace(temp_filename, filename)
 
-    # Write to CSV
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=keys)
-        writer.writeheader()
+def stream_to_json(data, filename, compress=False):
+    """
+    Write items into a JSON array file as they pass through, one item per
+    line, yielding each item on once it has been written
+    """
+    with open_atomic_output(filename, compress) as f:
+        f.write(b'[')
+        separator = b'\n'
+        for item in data:
+            f.write(separator)
+            f.write(json_dumps(item))
+            separator = b',\n'
+            yield item
+        f.write(b'\n]\n')
 
+def compile_key_paths(d, parent_key='', parent_path=(), sep='_'):
+    """
+    Flatten the key structure of a nested dictionary into a list of
+    (column name, tuple of nested keys) pairs
+    """
+    paths = []
+    for k, v in d.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        new_path = parent_path + (k,)
+
+        if isinstance(v, dict):
+            paths.extend(compile_key_paths(v, new_key, new_path, sep=sep))
+        else:
+            paths.append((new_key, new_path))
+    return paths
+
+def extract_value(item, path):
+    """
+    Walk a tuple of nested keys into an item, returning '' when missing
+    """
+    value = item
+    for key in path:
+        if not isinstance(value, dict):
+            return ''
+        value = value.get(key)
+
+    # Convert list to string to avoid CSV issues
+    if isinstance(value, list):
+        return str(value)
+    return value
+
+def stream_to_csv(data, filename, compress=False):
+    """
+    Write items into a CSV file as they pass through, yielding each item on
+    once it has been written. Columns are taken from the first item, and the
+    file is only created once there is an item to write.
+    """
+    writerow = None
+    with ExitStack() as stack:
         for item in data:
-            writer.writerow(flatten_dict(item))
+            if writerow is None:
+                # Predeclare the schema once, rows are then plain lists
+                paths = compile_key_paths(item)
+                keys = [key for key, _ in paths]
+                key_paths = [path for _, path in paths]
+                logger.info(f"Detected {len(keys)} unique keys for CSV")
 
-    logger.info(f"Successfully saved {len(data)} items to {filename}")
-    return filename
+                f = stack.enter_context(open_atomic_output(filename, compress, text=True))
+                writerow = csv.writer(f).writerow
+                writerow(keys)
+
+            writerow([extract_value(item, path) for path in key_paths])
+            yield item
+
+def save_to_files(data, json_filename=None, csv_filename=None, compress=False):
+    """
+    Stream data into both a JSON and a CSV file in a single pass.
+    Returns the two filenames; the CSV filename is None if there was no data.
+    """
+    if not json_filename:
+        json_filename = default_filename('json', compress)
+    if not csv_filename:
+        csv_filename = default_filename('csv', compress)
+
+    logger.info(f"Saving data to JSON file {json_filename} and CSV file {csv_filename}")
+
+    item_count = sum(1 for _ in stream_to_csv(stream_to_json(data, json_filename, compress), csv_filename, compress))
+
+    logger.info(f"Successfully saved {item_count} items to {json_filename}")
+
+    if not item_count:
+        logger.warning("No data to save to CSV.")
+        return json_filename, None
+
+    logger.info(f"Successfully saved {item_count} items to {csv_filename}")
+    return json_filename, csv_filename
 
 def validate_date(date_str):
     """
@@ -261,6 +784,12 @@ def main():
                         help='The action to filter for')
     parser.add_argument('--include', type=str, default='git',
                         help='Include additional data')
+    parser.add_argument('--graphql', action='store_true',
+                        help='Use the GraphQL audit log API instead of REST')
+    parser.add_argument('--compress', action='store_true',
+                        help='Gzip the JSON and CSV output files')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Do not keep an ETag cache of fetched pages in {CACHE_FILE}')
     args = parser.parse_args()
 
     # Format the date as required by GitHub API (ISO 8601)
@@ -271,22 +800,30 @@ def main():
 
     logger.info(f"Starting GitHub data retrieval process from date: {args.from_date}")
 
+    # The GraphQL API is POST only, so only REST pages are cached
+    cache = None
+    if not args.no_cache and not args.graphql:
+        cache = ResponseCache(CACHE_FILE)
+
     try:
         # Retrieve data
-        audit_log = get_paginated_data(url)
+        if args.graphql:
+            phrase = f"created:>={args.from_date} action:{args.action}"
+            audit_log = iter_graphql_audit_log(args.enterprise, phrase)
+        else:
+            audit_log = iter_paginated_data(url, cache=cache)
 
-        logger.info(f"Total entries retrieved: {len(audit_log)}")
-
-        # Save to JSON
-        json_filename = save_to_json(audit_log)
-
-        # Save to CSV
-        csv_filename = save_to_csv(audit_log)
+        # Save to JSON and CSV as pages arrive
+        json_filename, csv_filename = save_to_files(audit_log, compress=args.compress)
 
         logger.info("Data retrieval and saving process completed successfully")
 
     except Exception as e:
         logger.error(f"An error occurred: {e}")
 
+    finally:
+        if cache:
+            cache.close()
+
 if __name__ == "__main__":
     main()